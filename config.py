@@ -2,11 +2,19 @@
 Configuration loader and validator for PII redaction tool.
 """
 
+import sys
 import yaml
+from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+# Prefer the libyaml-based loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
 
 @dataclass
 class PIIField:
@@ -15,12 +23,22 @@ class PIIField:
     value: str
     replacement: str
     min_partial_length: int = 3
+    # Case variants of the replacement, for case-preserving redaction
+    replacement_upper: str = field(init=False, repr=False, compare=False)
+    replacement_lower: str = field(init=False, repr=False, compare=False)
+    replacement_capitalized: str = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if not self.value:
             raise ValueError(f"PII field '{self.name}' must have a non-empty value")
         if not self.replacement:
             raise ValueError(f"PII field '{self.name}' must have a non-empty replacement")
+        # Names key the per-file match counters; interned, their lookups hit the identity fast path
+        if isinstance(self.name, str):
+            self.name = sys.intern(self.name)
+        self.replacement_upper = self.replacement.upper()
+        self.replacement_lower = self.replacement.lower()
+        self.replacement_capitalized = self.replacement.capitalize()
 
 
 @dataclass
@@ -37,7 +55,7 @@ class Config:
             raise FileNotFoundError(f"Config file not found: {path}")
 
         with open(path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_Loader)
 
         return cls.from_dict(data)
 
@@ -78,24 +96,26 @@ class Config:
     def validate(self) -> list[str]:
         """Validate configuration and return list of warnings."""
         warnings = []
+        short_value_warnings = []
 
-        # Check for duplicate values
-        seen_values = {}
-        for pii_field in self.pii_fields:
-            lower_value = pii_field.value.lower()
-            if lower_value in seen_values:
-                warnings.append(
-                    f"Duplicate PII value '{pii_field.value}' in fields "
-                    f"'{seen_values[lower_value]}' and '{pii_field.name}'"
-                )
-            seen_values[lower_value] = pii_field.name
-
-        # Check for very short values
+        # Group field names by value (case-insensitive) and check for very short values
+        fields_by_value = defaultdict(list)
         for pii_field in self.pii_fields:
+            fields_by_value[pii_field.value.lower()].append(pii_field)
             if len(pii_field.value) < 3:
-                warnings.append(
+                short_value_warnings.append(
                     f"PII field '{pii_field.name}' has very short value '{pii_field.value}' "
                     f"which may cause many false positives"
                 )
 
+        # Report each duplicated value once, with every field that uses it
+        for pii_fields in fields_by_value.values():
+            if len(pii_fields) > 1:
+                names = [f"'{f.name}'" for f in pii_fields]
+                warnings.append(
+                    f"Duplicate PII value '{pii_fields[0].value}' in fields "
+                    f"{', '.join(names[:-1])} and {names[-1]}"
+                )
+
+        warnings.extend(short_value_warnings)
         return warnings
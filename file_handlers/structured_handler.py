@@ -2,13 +2,31 @@
 Handlers for structured files (JSON, YAML).
 """
 
+import copy
 import json
+import math
+import mmap
+import os
 import re
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the standard library json module
+    orjson = None
+
+# Prefer the libyaml-based loader and dumper when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+# Stack marker: re-key a dict once its keys have been redacted
+_REKEY = object()
+
 
 class StructuredHandler:
     """Base class for structured file handlers."""
@@ -16,22 +34,137 @@ class StructuredHandler:
     @staticmethod
     def redact_structure(data: Any, redact_func) -> Any:
         """
-        Recursively traverse and redact PII in a data structure.
+        Traverse and redact PII in a data structure, in place.
         redact_func: function that takes a string and returns redacted string.
+        Strings are visited in document order (each key before its value).
+        Returns the redacted structure (a new object only if data itself is a string).
         """
-        if isinstance(data, dict):
-            return {
-                StructuredHandler.redact_structure(k, redact_func):
-                StructuredHandler.redact_structure(v, redact_func)
-                for k, v in data.items()
-            }
-        elif isinstance(data, list):
-            return [StructuredHandler.redact_structure(item, redact_func) for item in data]
-        elif isinstance(data, str):
-            return redact_func(data)
-        else:
-            # Numbers, booleans, None - return as-is
-            return data
+        root = [data]
+        # Entries are (parent, key_or_index, value); strings are written back
+        # into their parent only when redact_func changed them
+        stack = [(root, 0, data)]
+        seen = set()  # ids of visited containers
+        # Unredacted copies of containers reached through several references
+        # (YAML aliases), keyed by id(), all taken before anything is redacted
+        originals = StructuredHandler._shared_containers(data)
+        snapshots = {id(snapshot): snapshot for snapshot in originals.values()}
+
+        while stack:
+            parent, slot, value = stack.pop()
+
+            if value is _REKEY:
+                # All keys and values of this dict are done; rebuild it only if a key changed
+                new_keys = slot
+                if any(new is not old for new, old in zip(new_keys, parent)):
+                    items = list(zip(new_keys, parent.values()))
+                    parent.clear()
+                    parent.update(items)
+            elif isinstance(value, str):
+                new_value = redact_func(value)
+                if new_value is not value:
+                    parent[slot] = new_value
+            elif isinstance(value, (dict, list)):
+                if id(value) in seen:
+                    if id(value) not in originals:
+                        continue
+                    # Another reference to an aliased container: redact a fresh copy
+                    # of the original, so every reference is counted by redact_func
+                    # and the output repeats the content instead of using anchors
+                    memo = {}
+                    value = copy.deepcopy(originals[id(value)], memo)
+                    parent[slot] = value
+                    # Aliased containers nested in the copy are shared within it
+                    # again; further references to them get fresh copies as well
+                    for snapshot_id, copied in memo.items():
+                        if snapshot_id in snapshots:
+                            originals[id(copied)] = snapshots[snapshot_id]
+                seen.add(id(value))
+
+                children = []
+                if isinstance(value, dict):
+                    new_keys = list(value)
+                    stack.append((value, new_keys, _REKEY))
+                    for i, (k, v) in enumerate(value.items()):
+                        children.append((new_keys, i, k))
+                        children.append((value, k, v))
+                else:
+                    children = [(value, i, item) for i, item in enumerate(value)]
+
+                # Reversed so the first child is popped first
+                stack.extend(reversed(children))
+            # Numbers, booleans, None - left as-is
+
+        return root[0]
+
+    @staticmethod
+    def _shared_containers(data: Any) -> dict[int, Any]:
+        """
+        Find the dicts and lists reachable through more than one reference,
+        except those that contain themselves (recursive aliases, which cannot
+        be expanded). Returns a deep copy of each, keyed by the id() of the
+        original, taken before any redaction.
+        """
+        objects = {}  # id() -> container, for every container reached
+        shared = set()
+        cyclic = set()
+        on_path = set()  # ids of the containers enclosing the current one
+        stack = [(data, False)]
+        while stack:
+            value, leaving = stack.pop()
+            if leaving:
+                on_path.discard(id(value))
+                continue
+            if isinstance(value, dict):
+                children = value.values()
+            elif isinstance(value, list):
+                children = value
+            else:
+                continue
+            if id(value) in objects:
+                shared.add(id(value))
+                if id(value) in on_path:
+                    cyclic.add(id(value))
+                continue
+            objects[id(value)] = value
+            on_path.add(id(value))
+            stack.append((value, True))
+            stack.extend((child, False) for child in children if isinstance(child, (dict, list)))
+
+        # One memo, so shared containers nested in each other are copied consistently
+        memo = {}
+        snapshots = {}
+        for container_id in shared - cyclic:
+            snapshots[container_id] = copy.deepcopy(objects[container_id], memo)
+        return snapshots
+
+
+def _json_loads(raw: bytes | memoryview) -> Any:
+    """Parse JSON from a bytes buffer, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity and integers beyond 64 bits, which the
+            # standard library accepts; let it decide (and report real errors)
+            pass
+    if isinstance(raw, memoryview):
+        raw = raw.obj if isinstance(raw.obj, bytes) else raw.tobytes()
+    return json.loads(raw)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """Check whether parsed JSON data contains NaN or an infinity."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return False
 
 
 class JSONHandler:
@@ -39,6 +172,9 @@ class JSONHandler:
 
     EXTENSIONS = {'.json'}
 
+    # Files at least this large are memory-mapped rather than read into a buffer
+    MMAP_THRESHOLD = 1024 * 1024
+
     @staticmethod
     def can_handle(path: Path) -> bool:
         """Check if this handler can process the given file."""
@@ -50,21 +186,44 @@ class JSONHandler:
         Read JSON file and return both raw text and parsed structure.
         Returns: (raw_text, parsed_data)
         """
-        with open(path, 'r', encoding='utf-8') as f:
-            raw_text = f.read()
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= JSONHandler.MMAP_THRESHOLD:
+                # Parse and decode straight from the mapping
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
 
         try:
-            data = json.loads(raw_text)
+            with memoryview(buffer) as view:
+                data = _json_loads(view)
+            raw_text = str(buffer, 'utf-8', 'replace')
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {path}: {e}")
+        finally:
+            # Don't leave the mapping to the garbage collector
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
 
         return raw_text, data
 
     @staticmethod
     def write(path: Path, data: Any, indent: int = 2) -> None:
         """Write data to JSON file."""
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=False)
+        if orjson is not None and indent == 2:
+            # orjson formats exponent floats differently (1e16, not 1e+16); the
+            # value round-trips the same, so this is accepted (see README)
+            try:
+                output = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits; the standard library handles those
+                output = None
+            # orjson writes NaN and Infinity as null; keep them as read, like the
+            # standard library does (only worth checking if a null was written)
+            if output is not None and not (b'null' in output and _has_non_finite_float(data)):
+                path.write_bytes(output)
+                return
+
+        path.write_bytes(json.dumps(data, indent=indent, ensure_ascii=False).encode('utf-8'))
 
     @staticmethod
     def get_output_path(input_path: Path, suffix: str = "_redacted") -> Path:
@@ -90,21 +249,23 @@ class YAMLHandler:
         Read YAML file and return both raw text and parsed structure.
         Returns: (raw_text, parsed_data)
         """
-        with open(path, 'r', encoding='utf-8') as f:
-            raw_text = f.read()
+        raw = path.read_bytes()
 
         try:
-            data = yaml.safe_load(raw_text)
+            data = yaml.load(raw, Loader=_Loader)
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML in {path}: {e}")
 
-        return raw_text, data
+        return str(raw, 'utf-8', 'replace'), data
 
     @staticmethod
     def write(path: Path, data: Any, default_flow_style: bool = False) -> None:
         """Write data to YAML file."""
-        with open(path, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, default_flow_style=default_flow_style, allow_unicode=True, sort_keys=False)
+        # Dump to bytes and write them in one call
+        path.write_bytes(yaml.dump(
+            data, Dumper=_Dumper, encoding='utf-8',
+            default_flow_style=default_flow_style, allow_unicode=True, sort_keys=False
+        ))
 
     @staticmethod
     def get_output_path(input_path: Path, suffix: str = "_redacted") -> Path:
@@ -2,7 +2,13 @@
 Handler for plain text files.
 """
 
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, TextIO
 
 
 class TextHandler:
@@ -10,6 +16,18 @@ class TextHandler:
 
     EXTENSIONS = {'.txt', '.log', '.text', '.md', '.csv', '.tsv'}
 
+    # Encodings to try, in order
+    ENCODINGS = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
+
+    # Files at least this large are memory-mapped rather than read into a buffer
+    MMAP_THRESHOLD = 1024 * 1024
+
+    # Files larger than this can be redacted in chunks instead of being read whole
+    STREAM_THRESHOLD = 16 * 1024 * 1024
+
+    # Approximate size of each streamed chunk, in characters
+    CHUNK_SIZE = 1024 * 1024
+
     @staticmethod
     def can_handle(path: Path) -> bool:
         """Check if this handler can process the given file."""
@@ -24,25 +42,78 @@ class TextHandler:
     @staticmethod
     def read(path: Path) -> str:
         """Read text content from file."""
-        # Try different encodings
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= TextHandler.MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return TextHandler._decode(view)
+            return TextHandler._decode(f.read())
 
-        for encoding in encodings:
+    @staticmethod
+    def _decode(data) -> str:
+        """Decode raw file content, trying different encodings."""
+        for encoding in TextHandler.ENCODINGS:
             try:
-                with open(path, 'r', encoding=encoding) as f:
-                    return f.read()
+                text = str(data, encoding)
+                break
             except UnicodeDecodeError:
                 continue
+        else:
+            # Last resort: decode with errors='replace'
+            text = str(data, 'utf-8', 'replace')
 
-        # Last resort: read with errors='replace'
-        with open(path, 'r', encoding='utf-8', errors='replace') as f:
-            return f.read()
+        # Normalize line endings the way text-mode open() does
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    @staticmethod
+    def iter_chunks(path: Path) -> Iterator[str]:
+        """
+        Yield the content of a UTF-8 file in chunks of whole lines, with line
+        endings normalized like read(). Raises UnicodeDecodeError if the file
+        is not UTF-8, so callers can fall back to read().
+        """
+        with open(path, 'r', encoding='utf-8', buffering=TextHandler.CHUNK_SIZE) as f:
+            while True:
+                lines = f.readlines(TextHandler.CHUNK_SIZE)
+                if not lines:
+                    return
+                yield ''.join(lines)
+
+    @staticmethod
+    @contextmanager
+    def open_writer(path: Path) -> Iterator[TextIO]:
+        """
+        Open a file for streamed writing, with the same encoding and newlines as
+        write(). Content goes to a temporary file next to path, which replaces
+        path only when the block completes, so the input can safely be the
+        output and a failed run leaves no partial file behind.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        tmp_path = Path(tmp_name)
+        try:
+            with open(fd, 'w', encoding='utf-8', buffering=TextHandler.CHUNK_SIZE) as f:
+                yield f
+            # mkstemp creates the file private; keep the permissions write() would give
+            if path.exists():
+                shutil.copymode(path, tmp_path)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_path, 0o666 & ~umask)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
     @staticmethod
     def write(path: Path, content: str) -> None:
         """Write text content to file."""
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Translate newlines like text-mode open() would, then write in one call
+        if os.linesep != '\n':
+            content = content.replace('\n', os.linesep)
+        path.write_bytes(content.encode('utf-8'))
 
     @staticmethod
     def get_output_path(input_path: Path, suffix: str = "_redacted") -> Path:
@@ -2,12 +2,48 @@
 Matching logic for exact and partial PII matches.
 """
 
+import bisect
 import re
-from dataclasses import dataclass
-from typing import Iterator
+from dataclasses import dataclass, field
+from itertools import accumulate
+from operator import attrgetter
+from typing import Callable, Iterator
 
 from config import PIIField
 
+try:
+    import ahocorasick
+except ImportError:  # e.g. running from a source checkout; fall back to per-field scans
+    ahocorasick = None
+
+# Non-ASCII characters that re.IGNORECASE matches to an ASCII character
+# ('İ' and 'ı' to 'i'/'I', 'ſ' to 's'/'S', the Kelvin sign to 'k'/'K')
+_ASCII_CASE_EQUIVALENTS = frozenset('\u0130\u0131\u017f\u212a')
+
+# Line boundaries recognised by str.splitlines()
+_LINE_BREAK = re.compile(r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+class LineIndex:
+    """Line start offsets of a text, for line numbers and on-demand line lookup."""
+
+    def __init__(self, text: str):
+        self.text = text
+        # Start offset of each line, using the same line boundaries as splitlines()
+        self.starts = [0] + [m.end() for m in _LINE_BREAK.finditer(text)]
+        # A trailing line break does not start another line (as with splitlines())
+        self.count = len(self.starts) - (self.starts[-1] == len(text))
+
+    def line_number(self, pos: int) -> int:
+        """1-indexed number of the line containing pos."""
+        return bisect.bisect_right(self.starts, pos)
+
+    def line(self, number: int) -> str:
+        """Text of a 1-indexed line, without a trailing newline or carriage return."""
+        start = self.starts[number - 1]
+        end = self.starts[number] if number < len(self.starts) else len(self.text)
+        return self.text[start:end].rstrip('\n\r')
+
 
 @dataclass
 class Match:
@@ -18,15 +54,32 @@ class Match:
     matched_text: str  # The actual text that was matched
     is_exact: bool  # True if exact match, False if partial/probable
     line_number: int = 0  # Line number (1-indexed)
-    context_before: list[str] = None  # Lines before the match
-    context_after: list[str] = None   # Lines after the match
-    line_text: str = ""  # The full line containing the match
-
-    def __post_init__(self):
-        if self.context_before is None:
-            self.context_before = []
-        if self.context_after is None:
-            self.context_after = []
+    # Set by annotate_line_offsets(); context lines are only built when read
+    _lines: LineIndex = field(default=None, repr=False, compare=False)
+    _context_lines: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def line_text(self) -> str:
+        """The full line containing the match."""
+        if self._lines is None or not 0 < self.line_number <= self._lines.count:
+            return ""
+        return self._lines.line(self.line_number)
+
+    @property
+    def context_before(self) -> list[str]:
+        """Lines before the match."""
+        if self._lines is None:
+            return []
+        first = max(1, self.line_number - self._context_lines)
+        return [self._lines.line(n) for n in range(first, self.line_number)]
+
+    @property
+    def context_after(self) -> list[str]:
+        """Lines after the match."""
+        if self._lines is None:
+            return []
+        last = min(self._lines.count, self.line_number + self._context_lines)
+        return [self._lines.line(n) for n in range(self.line_number + 1, last + 1)]
 
 
 class Matcher:
@@ -43,45 +96,173 @@ class Matcher:
             reverse=True
         )
 
+        # Values as searched for: lowercased when case-insensitive, since the
+        # text is lowercased once per scan instead of case-folding in the regex engine.
+        # lower() rather than casefold(): casefold() expands characters such as 'ß'
+        # to 'ss', which would shift positions in far more texts
+        self._needles = [
+            f.value if case_sensitive else f.value.lower()
+            for f in self.pii_fields_sorted
+        ]
+
+        # Searching lowercased text only matches exactly like IGNORECASE (and so
+        # independently of the rest of the text) for ASCII text, and only if no
+        # value contains a character IGNORECASE equates with an ASCII one
+        self._lower_ascii_ok = not any(
+            _ASCII_CASE_EQUIVALENTS.intersection(f.value) for f in self.pii_fields_sorted
+        )
+
+        # IGNORECASE pattern per field, built on first use for text that
+        # cannot be searched lowercased
+        self._compiled_ignorecase = None
+
+        # Per-field attributes used inside the match loops
+        self._is_alnum = [f.value.replace(' ', '').isalnum() for f in self.pii_fields_sorted]
+        self._skip_partial = [
+            not is_alnum or len(f.value) < f.min_partial_length
+            for f, is_alnum in zip(self.pii_fields_sorted, self._is_alnum)
+        ]
+
+        # Last (text, lowercased text) pair, shared by exact and partial scans of the
+        # same text; cleared by find_partial_matches, the last scan of a text, so a
+        # long-lived matcher does not keep the previous file alive
+        self._lower_text_cache = (None, None)
+
+        # One automaton over all PII values so a scan is a single pass over the text
+        self._automaton = None
+        if ahocorasick is not None and self.pii_fields_sorted:
+            # Each needle maps to every field with that value, in field order, so a
+            # scan that skips the first of them can still report a later one
+            fields_by_needle: dict[str, list[int]] = {}
+            for idx, needle in enumerate(self._needles):
+                fields_by_needle.setdefault(needle, []).append(idx)
+            self._automaton = ahocorasick.Automaton()
+            for needle, indices in fields_by_needle.items():
+                self._automaton.add_word(needle, (tuple(indices), len(needle)))
+            self._automaton.make_automaton()
+
+    def _haystack(self, text: str) -> str | None:
+        """
+        Return the text to search for the needles: the text itself, or its
+        lowercased copy when matching is case-insensitive.
+        Returns None if the text must be searched with IGNORECASE patterns
+        instead (non-ASCII text, or values with characters such as 'ſ').
+        """
+        if self.case_sensitive:
+            return text
+        if not (self._lower_ascii_ok and text.isascii()):
+            return None
+
+        cached_text, lowered = self._lower_text_cache
+        if cached_text is text:
+            return lowered
+
+        # ASCII lowercases in place, so match positions carry over
+        lowered = text.lower()
+        self._lower_text_cache = (text, lowered)
+        return lowered
+
+    def _find_occurrences(self, text: str, skip: list[bool] = None) -> list[tuple[int, int, int]]:
+        """
+        Find all occurrences of every PII value in text.
+        skip: optional per-field flags (indexed like pii_fields_sorted) of fields to ignore.
+        Returns (field_index, start, end) tuples sorted by field, then position.
+        """
+        haystack = self._haystack(text)
+        if haystack is None:
+            return self._find_occurrences_regex(text, skip)
+        if self._automaton is None:
+            return self._find_occurrences_literal(haystack, skip)
+
+        occurrences = []
+        # Occurrences of the same field must not overlap, matching re.finditer
+        last_end = [0] * len(self.pii_fields_sorted)
+        for end_index, (indices, length) in self._automaton.iter(haystack):
+            # First field with this value that the scan doesn't skip, like the
+            # per-field scans (later duplicates are dropped by the callers)
+            for idx in indices:
+                if not (skip and skip[idx]):
+                    break
+            else:
+                continue
+            start = end_index + 1 - length
+            if start < last_end[idx]:
+                continue
+            last_end[idx] = end_index + 1
+            occurrences.append((idx, start, end_index + 1))
+
+        occurrences.sort()
+        return occurrences
+
+    def _find_occurrences_literal(self, haystack: str, skip: list[bool] = None) -> list[tuple[int, int, int]]:
+        """Find all occurrences of every PII value in haystack, one str.find scan per field."""
+        occurrences = []
+
+        for idx, needle in enumerate(self._needles):
+            if skip and skip[idx]:
+                continue
+            length = len(needle)
+            i = haystack.find(needle)
+            while i >= 0:
+                occurrences.append((idx, i, i + length))
+                i = haystack.find(needle, i + length)
+
+        return occurrences
+
+    def _find_occurrences_regex(self, text: str, skip: list[bool] = None) -> list[tuple[int, int, int]]:
+        """Find all occurrences of every PII value in text, one case-insensitive regex scan per field."""
+        if self._compiled_ignorecase is None:
+            self._compiled_ignorecase = [
+                re.compile(re.escape(f.value), re.IGNORECASE) for f in self.pii_fields_sorted
+            ]
+
+        occurrences = []
+
+        for idx, pattern in enumerate(self._compiled_ignorecase):
+            if skip and skip[idx]:
+                continue
+            for m in pattern.finditer(text):
+                occurrences.append((idx, m.start(), m.end()))
+
+        return occurrences
+
     def find_exact_matches(self, text: str) -> list[Match]:
-        """Find all exact matches of PII values in text (standalone, not part of larger words)."""
+        """
+        Find all exact matches of PII values in text (standalone, not part of larger words).
+        The matches are returned in ascending order of start position.
+        """
         matches = []
-        flags = 0 if self.case_sensitive else re.IGNORECASE
-
-        for pii_field in self.pii_fields_sorted:
-            pattern = re.escape(pii_field.value)
-
-            for m in re.finditer(pattern, text, flags):
-                # Check if this is a standalone match (not part of a larger word)
-                # Character before should NOT be alphanumeric (or be start of string)
-                # Character after should NOT be alphanumeric (or be end of string)
-                start, end = m.start(), m.end()
-
-                char_before = text[start - 1] if start > 0 else ''
-                char_after = text[end] if end < len(text) else ''
-
-                # For alphanumeric PII values, check word boundaries
-                # For PII with special chars (emails, etc.), be more lenient
-                is_alnum_pii = pii_field.value.replace(' ', '').isalnum()
-
-                if is_alnum_pii:
-                    # Strict word boundary check for names, IDs, etc.
-                    before_ok = not char_before.isalnum() and char_before != '_'
-                    after_ok = not char_after.isalnum() and char_after != '_'
-                else:
-                    # Looser check for emails, phone numbers, etc.
-                    # Just ensure it's not embedded in a longer version of the same pattern
-                    before_ok = not char_before.isalnum()
-                    after_ok = not char_after.isalnum()
-
-                if before_ok and after_ok:
-                    matches.append(Match(
-                        pii_field=pii_field,
-                        start=start,
-                        end=end,
-                        matched_text=m.group(),
-                        is_exact=True
-                    ))
+        text_len = len(text)
+        fields = self.pii_fields_sorted
+        is_alnum = self._is_alnum
+
+        for idx, start, end in self._find_occurrences(text):
+            # Check if this is a standalone match (not part of a larger word)
+            # Character before should NOT be alphanumeric (or be start of string)
+            # Character after should NOT be alphanumeric (or be end of string)
+            char_before = text[start - 1] if start > 0 else ''
+            char_after = text[end] if end < text_len else ''
+
+            # For alphanumeric PII values, check word boundaries
+            # For PII with special chars (emails, etc.), be more lenient
+            if is_alnum[idx]:
+                # Strict word boundary check for names, IDs, etc.
+                before_ok = not char_before.isalnum() and char_before != '_'
+                after_ok = not char_after.isalnum() and char_after != '_'
+            else:
+                # Looser check for emails, phone numbers, etc.
+                # Just ensure it's not embedded in a longer version of the same pattern
+                before_ok = not char_before.isalnum()
+                after_ok = not char_after.isalnum()
+
+            if before_ok and after_ok:
+                matches.append(Match(
+                    pii_field=fields[idx],
+                    start=start,
+                    end=end,
+                    matched_text=text[start:end],
+                    is_exact=True
+                ))
 
         # Remove matches that are fully contained within other matches
         # (e.g., "john" within "john.smith@gmail.com")
@@ -94,20 +275,18 @@ class Matcher:
         if not matches:
             return matches
 
-        # Sort by start position, then by length (longer first)
-        sorted_matches = sorted(matches, key=lambda m: (m.start, -(m.end - m.start)))
+        # Sort by start position, then by length (longer first), so any match
+        # enclosing another one comes before it
+        sorted_matches = sorted(matches, key=lambda m: (m.start, -m.end))
 
+        # Single sweep: a match is contained in an earlier one exactly when it
+        # ends no later than the furthest end seen so far
         result = []
+        cur_end = -1
         for match in sorted_matches:
-            # Check if this match is contained within any existing match
-            is_contained = False
-            for existing in result:
-                if match.start >= existing.start and match.end <= existing.end:
-                    # This match is fully contained within an existing one
-                    is_contained = True
-                    break
-            if not is_contained:
+            if match.end > cur_end:
                 result.append(match)
+                cur_end = match.end
 
         return result
 
@@ -117,68 +296,61 @@ class Matcher:
         These are matches where the PII is embedded in something larger.
         """
         matches = []
-        flags = 0 if self.case_sensitive else re.IGNORECASE
-
-        # Build set of exact match ranges to avoid duplicates
-        exact_ranges = []
-        if exact_matches:
-            exact_ranges = [(m.start, m.end) for m in exact_matches]
-
-        for pii_field in self.pii_fields_sorted:
-            # Skip non-alphanumeric PII (emails, phone numbers) - partial matching less useful
-            if not pii_field.value.replace(' ', '').isalnum():
+        text_len = len(text)
+        fields = self.pii_fields_sorted
+
+        # Sorted exact match starts, with the furthest end reached up to each one,
+        # to skip candidates overlapping an exact match with a binary search
+        exact_ranges = sorted((m.start, m.end) for m in exact_matches or ())
+        exact_starts = [start for start, _ in exact_ranges]
+        exact_max_ends = list(accumulate((end for _, end in exact_ranges), max))
+
+        # Skip non-alphanumeric PII (emails, phone numbers) - partial matching less useful
+        # and values too short for partial matching
+        for idx, start, end in self._find_occurrences(text, self._skip_partial):
+            # Check characters around the match
+            char_before = text[start - 1] if start > 0 else ''
+            char_after = text[end] if end < text_len else ''
+
+            # This is a partial match if it's connected to other alphanumeric chars
+            has_alnum_before = char_before.isalnum() or char_before == '_'
+            has_alnum_after = char_after.isalnum() or char_after == '_'
+
+            if not (has_alnum_before or has_alnum_after):
+                # This is a standalone match, not partial
                 continue
 
-            # Skip if value is too short for partial matching
-            if len(pii_field.value) < pii_field.min_partial_length:
+            # Skip if this overlaps with an exact match: some exact match starting
+            # before our end must reach past our start
+            i = bisect.bisect_left(exact_starts, end) - 1
+            if i >= 0 and exact_max_ends[i] > start:
                 continue
 
-            pattern = re.escape(pii_field.value)
-
-            for m in re.finditer(pattern, text, flags):
-                start, end = m.start(), m.end()
-
-                # Check characters around the match
-                char_before = text[start - 1] if start > 0 else ''
-                char_after = text[end] if end < len(text) else ''
-
-                # This is a partial match if it's connected to other alphanumeric chars
-                has_alnum_before = char_before.isalnum() or char_before == '_'
-                has_alnum_after = char_after.isalnum() or char_after == '_'
+            # The token may not extend into an exact match (e.g. an email after '_'),
+            # so the exact replacement always applies to the whole exact match
+            left_limit = exact_max_ends[i] if i >= 0 else 0
+            right_limit = exact_starts[i + 1] if i + 1 < len(exact_starts) else text_len
 
-                if not (has_alnum_before or has_alnum_after):
-                    # This is a standalone match, not partial
-                    continue
+            # Find the full token containing this match
+            # Expand left
+            token_start = start
+            while token_start > left_limit and (text[token_start - 1].isalnum() or text[token_start - 1] == '_'):
+                token_start -= 1
 
-                # Skip if this overlaps with an exact match
-                overlaps_exact = False
-                for ex_start, ex_end in exact_ranges:
-                    if not (end <= ex_start or start >= ex_end):
-                        overlaps_exact = True
-                        break
-                if overlaps_exact:
-                    continue
+            # Expand right
+            token_end = end
+            while token_end < right_limit and (text[token_end].isalnum() or text[token_end] == '_'):
+                token_end += 1
 
-                # Find the full token containing this match
-                # Expand left
-                token_start = start
-                while token_start > 0 and (text[token_start - 1].isalnum() or text[token_start - 1] == '_'):
-                    token_start -= 1
+            full_token = text[token_start:token_end]
 
-                # Expand right
-                token_end = end
-                while token_end < len(text) and (text[token_end].isalnum() or text[token_end] == '_'):
-                    token_end += 1
-
-                full_token = text[token_start:token_end]
-
-                matches.append(Match(
-                    pii_field=pii_field,
-                    start=token_start,
-                    end=token_end,
-                    matched_text=full_token,
-                    is_exact=False
-                ))
+            matches.append(Match(
+                pii_field=fields[idx],
+                start=token_start,
+                end=token_end,
+                matched_text=full_token,
+                is_exact=False
+            ))
 
         # Remove duplicates (same position, different PII fields - keep first)
         seen = set()
@@ -189,58 +361,88 @@ class Matcher:
                 seen.add(key)
                 unique_matches.append(m)
 
+        # Don't pin this text (and its lowercased copy) until the next scan
+        self._lower_text_cache = (None, None)
+
         return unique_matches
 
-    def add_line_context(self, text: str, matches: list[Match], context_lines: int = 2) -> None:
-        """Add line number and surrounding context to matches."""
-        lines = text.splitlines(keepends=True)
-
-        # Build position-to-line mapping
-        line_starts = []
-        pos = 0
-        for line in lines:
-            line_starts.append(pos)
-            pos += len(line)
-
-        def get_line_number(position: int) -> int:
-            """Get 1-indexed line number for a position."""
-            for i, start in enumerate(line_starts):
-                if i + 1 < len(line_starts):
-                    if start <= position < line_starts[i + 1]:
-                        return i + 1
-                else:
-                    if start <= position:
-                        return i + 1
-            return len(lines)
+    def annotate_line_offsets(self, text: str, matches: list[Match], context_lines: int = 2) -> None:
+        """
+        Set the line number of each match. Context lines are not built here;
+        the matches read them from the text on demand, when they are shown.
+        """
+        if not matches:
+            return
 
+        lines = LineIndex(text)
         for match in matches:
-            line_num = get_line_number(match.start)
-            match.line_number = line_num
-
-            # Get the line text (strip newline)
-            if 0 < line_num <= len(lines):
-                match.line_text = lines[line_num - 1].rstrip('\n\r')
-
-            # Get context before
-            start_ctx = max(0, line_num - 1 - context_lines)
-            match.context_before = [
-                lines[i].rstrip('\n\r')
-                for i in range(start_ctx, line_num - 1)
-            ]
-
-            # Get context after
-            end_ctx = min(len(lines), line_num + context_lines)
-            match.context_after = [
-                lines[i].rstrip('\n\r')
-                for i in range(line_num, end_ctx)
-            ]
+            match.line_number = lines.line_number(match.start)
+            match._lines = lines
+            match._context_lines = context_lines
 
 
-def apply_replacement(text: str, match: Match, preserve_case: bool = True) -> str:
+def first_occurrence_finder(tokens: list[str]) -> Callable[[str], int]:
+    """
+    Build a function returning the lowest index i such that tokens[i] may occur
+    in a string, or len(tokens) if none does, with a single scan of the string.
+    Without pyahocorasick any hit is reported as index 0.
+    """
+    none = len(tokens)
+    if not tokens:
+        return lambda s: none
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for i, token in enumerate(tokens):
+            if token not in automaton:
+                automaton.add_word(token, i)
+        automaton.make_automaton()
+        return lambda s: min((i for _, i in automaton.iter(s)), default=none)
+
+    # Longest first, although any alternative matching at a position is enough
+    pattern = re.compile('|'.join(map(re.escape, sorted(set(tokens), key=len, reverse=True))))
+    return lambda s: 0 if pattern.search(s) else none
+
+
+def apply_replacements(
+    text: str,
+    matches: list[Match],
+    preserve_case: bool = True,
+    replacement_func: Callable[[Match], str] = None,
+    presorted: bool = False
+) -> str:
     """
-    Apply a single replacement to text.
+    Apply all replacements to text in a single left-to-right pass.
+    Matches overlapping an earlier (already applied) match are skipped.
     If preserve_case is True, tries to match the case pattern of the original.
+    replacement_func: optional function giving the replacement text for a match
+    (defaults to build_replacement).
+    presorted: matches are already ordered by start position (e.g. the result
+    of find_exact_matches), so they need no sorting.
     """
+    if not matches:
+        return text
+    if not presorted:
+        matches = sorted(matches, key=attrgetter('start'))
+
+    parts = []
+    cursor = 0
+    for match in matches:
+        if match.start < cursor:
+            continue
+        parts.append(text[cursor:match.start])
+        if replacement_func is not None:
+            parts.append(replacement_func(match))
+        else:
+            parts.append(build_replacement(match, preserve_case))
+        cursor = match.end
+    parts.append(text[cursor:])
+
+    return ''.join(parts)
+
+
+def build_replacement(match: Match, preserve_case: bool = True) -> str:
+    """Build the text that replaces match.matched_text."""
     original = match.matched_text
     replacement = match.pii_field.replacement
 
@@ -256,21 +458,24 @@ def apply_replacement(text: str, match: Match, preserve_case: bool = True) -> st
             matched_pii = original[idx:idx + len(pii_value)]
 
             # Apply case preservation to replacement
-            case_adjusted = _adjust_case(replacement, matched_pii)
+            case_adjusted = _adjust_case(match.pii_field, matched_pii)
             replacement = before + case_adjusted + after
     elif preserve_case:
-        replacement = _adjust_case(replacement, original)
+        replacement = _adjust_case(match.pii_field, original)
 
-    return text[:match.start] + replacement + text[match.end:]
+    return replacement
 
 
-def _adjust_case(replacement: str, original: str) -> str:
-    """Adjust the case of replacement to match original's pattern."""
+def _adjust_case(pii_field: PIIField, original: str) -> str:
+    """Return the field's replacement, adjusted to match original's case pattern."""
+    if not original:
+        return pii_field.replacement
     if original.isupper():
-        return replacement.upper()
+        return pii_field.replacement_upper
     elif original.islower():
-        return replacement.lower()
-    elif original.istitle() or (original and original[0].isupper()):
-        return replacement.capitalize()
+        return pii_field.replacement_lower
+    # Cheap first-character test before the full istitle() scan
+    elif original[0].isupper() or original.istitle():
+        return pii_field.replacement_capitalized
     else:
-        return replacement
+        return pii_field.replacement
@@ -14,13 +14,15 @@ Default config location: ~/.config/pii_redact/config.yaml
 """
 
 import argparse
+import os
 import sys
-from glob import glob
+from glob import iglob
 from pathlib import Path
 
 from config import Config
 
 DEFAULT_CONFIG_PATH = Path.home() / ".config" / "pii_redact" / "config.yaml"
+from matchers import Matcher
 from redactor import Redactor
 from reporters import Report, ConsoleReporter
 
@@ -102,9 +104,8 @@ def expand_glob(pattern: str) -> list[Path]:
     """Expand glob pattern to list of file paths."""
     # Check if it's a glob pattern or single file
     if '*' in pattern or '?' in pattern or '[' in pattern:
-        # Use recursive glob
-        matches = glob(pattern, recursive=True)
-        files = [Path(m) for m in matches if Path(m).is_file()]
+        # Use recursive glob, filtering matches as they are produced
+        files = [Path(m) for m in iglob(pattern, recursive=True) if os.path.isfile(m)]
     else:
         # Single file
         path = Path(pattern)
@@ -154,6 +155,9 @@ def main():
     for warning in warnings:
         reporter.print_warning(warning)
 
+    # Build the matcher once for all input files
+    matcher = Matcher(config.pii_fields, config.case_sensitive)
+
     # Expand input pattern
     input_files = expand_glob(args.input)
 
@@ -168,7 +172,8 @@ def main():
         dry_run=args.dry_run,
         interactive=not args.no_interactive,
         context_lines=args.context_lines,
-        reporter=reporter
+        reporter=reporter,
+        matcher=matcher
     )
 
     # Initialize report
@@ -179,15 +184,9 @@ def main():
     print(f"Files to process: {len(input_files)}")
     print(f"PII fields configured: {len(config.pii_fields)}")
 
-    # Process each file
-    for input_path in input_files:
-        try:
-            output_path = Path(args.output) if args.output else None
-            stats = redactor.process_file(input_path, output_path)
-            report.add_file_stats(stats)
-        except Exception as e:
-            reporter.print_error(f"Failed to process {input_path}: {e}")
-            continue
+    # Process files (in parallel when no prompts are needed)
+    output_path = Path(args.output) if args.output else None
+    redactor.process_files(input_files, report, output_path)
 
     # Complete report
     report.complete()
@@ -2,17 +2,69 @@
 Core redaction engine.
 """
 
+import io
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Callable
 
 from config import Config, PIIField
-from matchers import Match, Matcher, apply_replacement
+from matchers import Match, Matcher, apply_replacements, build_replacement, first_occurrence_finder
 from reporters import FileStats, Report, ConsoleReporter
 from file_handlers.text_handler import TextHandler
 from file_handlers.structured_handler import JSONHandler, YAMLHandler, StructuredHandler
 
 
+def _replace_preserving_case(m: re.Match, pii_field: PIIField) -> str:
+    """re.sub callback: the field's replacement, in the case pattern of the matched PII value."""
+    original = m.group()
+    if original.isupper():
+        return pii_field.replacement_upper
+    elif original.islower():
+        return pii_field.replacement_lower
+    elif original[0].isupper():
+        return pii_field.replacement_capitalized
+    return pii_field.replacement
+
+
+# Per-process redactor used by process_files() workers
+_worker_redactor: "Redactor" = None
+
+
+def _init_worker(
+    config: Config,
+    dry_run: bool,
+    context_lines: int,
+    reporter: ConsoleReporter,
+    matcher: Matcher
+) -> None:
+    """Build the worker's redactor once per process, from copies of the parent's reporter and matcher."""
+    global _worker_redactor
+    _worker_redactor = Redactor(
+        config=config,
+        dry_run=dry_run,
+        interactive=False,
+        context_lines=context_lines,
+        reporter=reporter,
+        matcher=matcher
+    )
+
+
+def _process_file_in_worker(input_path: Path, output_path: Path) -> tuple[FileStats | None, str, str | None]:
+    """Process one file, returning its stats, captured console output and error message."""
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        try:
+            stats = _worker_redactor.process_file(input_path, output_path)
+        except Exception as e:
+            return None, buf.getvalue(), str(e)
+    return stats, buf.getvalue(), None
+
+
 class Redactor:
     """Main redaction engine that coordinates the redaction process."""
 
@@ -22,14 +74,68 @@ class Redactor:
         dry_run: bool = False,
         interactive: bool = True,
         context_lines: int = 2,
-        reporter: ConsoleReporter = None
+        reporter: ConsoleReporter = None,
+        matcher: Matcher = None
     ):
         self.config = config
         self.dry_run = dry_run
         self.interactive = interactive
         self.context_lines = context_lines
         self.reporter = reporter or ConsoleReporter()
-        self.matcher = Matcher(config.pii_fields, config.case_sensitive)
+        # Built once and reused for every file; callers may pass a prebuilt one
+        self.matcher = matcher or Matcher(config.pii_fields, config.case_sensitive)
+        # Compiled PII value pattern and re.sub callback for partial replacement,
+        # keyed by id() of the PIIField
+        self._partial_patterns: dict[int, tuple[re.Pattern, Callable[[re.Match], str]]] = {}
+        # Large text files can be redacted chunk by chunk (on line boundaries) when
+        # nothing needs whole-file context: no prompts, and no PII value spans lines
+        self._can_stream = not interactive and not any(
+            '\n' in f.value or '\r' in f.value for f in config.pii_fields
+        )
+
+    def process_files(self, input_paths: list[Path], report: Report, output_path: Path = None) -> Report:
+        """
+        Process files and add their statistics to the report. In non-interactive
+        mode several files are processed in parallel worker processes; their
+        console output is printed in input order once each file is done.
+        Each worker uses a copy of this redactor's reporter and matcher, so both
+        must be picklable.
+        """
+        workers = min(os.cpu_count() or 1, len(input_paths))
+        if self.interactive or workers < 2:
+            for input_path in input_paths:
+                try:
+                    report.add_file_stats(self.process_file(input_path, output_path))
+                except Exception as e:
+                    self.reporter.print_error(f"Failed to process {input_path}: {e}")
+            return report
+
+        # Don't let forked workers inherit unflushed output
+        sys.stdout.flush()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.config, self.dry_run, self.context_lines, self.reporter, self.matcher)
+        ) as executor:
+            futures = [
+                executor.submit(_process_file_in_worker, input_path, output_path)
+                for input_path in input_paths
+            ]
+            for input_path, future in zip(input_paths, futures):
+                try:
+                    stats, output, error = future.result()
+                except Exception as e:
+                    # e.g. BrokenProcessPool when a worker is killed; the files
+                    # already done still make it into the summary and report
+                    self.reporter.print_error(f"Failed to process {input_path}: {e}")
+                    continue
+                sys.stdout.write(output)
+                if error is None:
+                    report.add_file_stats(stats)
+                else:
+                    self.reporter.print_error(f"Failed to process {input_path}: {error}")
+
+        return report
 
     def process_file(self, input_path: Path, output_path: Path = None) -> FileStats:
         """Process a single file and return statistics."""
@@ -53,54 +159,72 @@ class Redactor:
 
         self.reporter.print_file_start(str(input_path))
 
+        if self._can_stream and input_path.stat().st_size > TextHandler.STREAM_THRESHOLD:
+            try:
+                self._process_text_stream(input_path, output_path, stats)
+            except UnicodeDecodeError:
+                # Not UTF-8: start over with read(), which tries other encodings
+                stats = FileStats(
+                    file_path=str(input_path),
+                    output_path=str(output_path)
+                )
+            else:
+                self.reporter.print_exact_matches(stats)
+                self.reporter.print_partial_summary(stats.total_partial_found)
+                self.reporter.print_file_complete(stats)
+                return stats
+
         # Read file
         text = TextHandler.read(input_path)
 
         # Find exact matches
         exact_matches = self.matcher.find_exact_matches(text)
-        self.matcher.add_line_context(text, exact_matches, self.context_lines)
 
         # Track stats for exact matches
-        for match in exact_matches:
-            stats.add_exact_match(match.pii_field.name)
-
-        # Apply exact replacements (process from end to start to preserve positions)
-        exact_matches_sorted = sorted(exact_matches, key=lambda m: m.start, reverse=True)
-        for match in exact_matches_sorted:
-            text = apply_replacement(text, match, preserve_case=True)
+        stats.add_exact_matches(match.pii_field.name for match in exact_matches)
 
         self.reporter.print_exact_matches(stats)
 
-        # Find partial matches (on already-redacted text, but using original positions)
-        # Re-read and find partials on original text
-        original_text = TextHandler.read(input_path)
-        partial_matches = self.matcher.find_partial_matches(original_text, exact_matches)
-        self.matcher.add_line_context(original_text, partial_matches, self.context_lines)
+        # Find partial matches on the same (unmodified) text; replacements are
+        # applied together afterwards, so all match positions stay valid
+        partial_matches = self.matcher.find_partial_matches(text, exact_matches)
+        if self.interactive:
+            # Line numbers are only shown in the prompt; non-interactive runs just count
+            self.matcher.annotate_line_offsets(text, partial_matches, self.context_lines)
 
         # Track stats for partial matches
-        for match in partial_matches:
-            stats.add_partial_match(match.pii_field.name)
+        stats.add_partial_matches(match.pii_field.name for match in partial_matches)
 
         self.reporter.print_partial_summary(len(partial_matches))
 
         # Handle partial matches
+        replacements = list(exact_matches)
+        merged_replacements = {}
         if partial_matches and self.interactive:
             selected_indices = self._prompt_partial_matches(partial_matches)
 
-            # Apply selected partial replacements
-            # Need to recalculate positions after exact matches were applied
-            # For simplicity, we'll do a second pass on the text
+            selected_matches = []
             for i, match in enumerate(partial_matches):
                 if i in selected_indices:
                     stats.add_partial_replaced(match.pii_field.name)
-                    # Replace in the current text using the matched_text
-                    text = self._replace_partial(text, match)
+                    selected_matches.append(match)
                 else:
                     stats.add_partial_skipped(match.pii_field.name)
+
+            # Partial tokens never overlap exact matches, but may overlap each other
+            merged_matches, merged_replacements = self._merge_partial_matches(text, selected_matches)
+            replacements.extend(merged_matches)
         elif partial_matches:
             # Non-interactive mode: skip all partial matches
-            for match in partial_matches:
-                stats.add_partial_skipped(match.pii_field.name)
+            stats.add_partial_skipped_all(match.pii_field.name for match in partial_matches)
+
+        # Apply exact and selected partial replacements in one pass over the text
+        # (exact matches come sorted by position; only added partials need a sort)
+        text = apply_replacements(
+            text, replacements,
+            replacement_func=lambda m: merged_replacements.get(id(m)) or self._replacement_text(m),
+            presorted=len(replacements) == len(exact_matches)
+        )
 
         # Write output
         if not self.dry_run:
@@ -109,6 +233,31 @@ class Redactor:
         self.reporter.print_file_complete(stats)
         return stats
 
+    def _process_text_stream(self, input_path: Path, output_path: Path, stats: FileStats) -> None:
+        """
+        Redact a large text file in chunks of whole lines, writing each chunk as
+        it is done (to a temporary file that replaces the output at the end).
+        Non-interactive only: partial matches are counted and skipped.
+        """
+        with ExitStack() as stack:
+            out = None if self.dry_run else stack.enter_context(TextHandler.open_writer(output_path))
+
+            for chunk in TextHandler.iter_chunks(input_path):
+                exact_matches = self.matcher.find_exact_matches(chunk)
+                stats.add_exact_matches(match.pii_field.name for match in exact_matches)
+
+                partial_names = [
+                    match.pii_field.name
+                    for match in self.matcher.find_partial_matches(chunk, exact_matches)
+                ]
+                stats.add_partial_matches(partial_names)
+                stats.add_partial_skipped_all(partial_names)
+
+                if out is not None:
+                    out.write(apply_replacements(
+                        chunk, exact_matches, replacement_func=self._replacement_text, presorted=True
+                    ))
+
     def _process_structured_file(self, input_path: Path, output_path: Path, handler_class) -> FileStats:
         """Process a structured (JSON/YAML) file."""
         if output_path is None:
@@ -124,20 +273,21 @@ class Redactor:
         # Read file
         raw_text, data = handler_class.read(input_path)
 
-        # Create a redaction function that tracks stats
-        def redact_string(s: str) -> str:
-            result = s
-
-            # Find and apply exact matches
-            exact_matches = self.matcher.find_exact_matches(result)
-            for match in exact_matches:
-                stats.add_exact_match(match.pii_field.name)
+        # Exact redaction of a single string, memoized because structured files
+        # often repeat the same values. Returns the redacted string and the
+        # names of the matched fields, so stats can be counted per occurrence.
+        @lru_cache(maxsize=4096)
+        def redact_exact(s: str) -> tuple[str, tuple[str, ...]]:
+            exact_matches = self.matcher.find_exact_matches(s)
+            names = tuple(match.pii_field.name for match in exact_matches)
 
-            # Apply exact replacements (from end to start)
-            exact_matches_sorted = sorted(exact_matches, key=lambda m: m.start, reverse=True)
-            for match in exact_matches_sorted:
-                result = apply_replacement(result, match, preserve_case=True)
+            # Apply exact replacements in one pass over the string
+            return apply_replacements(s, exact_matches, preserve_case=True, presorted=True), names
 
+        # Create a redaction function that tracks stats
+        def redact_string(s: str) -> str:
+            result, names = redact_exact(s)
+            stats.add_exact_matches(names)
             return result
 
         # Redact the structure
@@ -146,11 +296,15 @@ class Redactor:
         self.reporter.print_exact_matches(stats)
 
         # For structured files, we handle partial matches on the raw text
-        partial_matches = self.matcher.find_partial_matches(raw_text)
-        self.matcher.add_line_context(raw_text, partial_matches, self.context_lines)
+        # Pass the exact matches so partial tokens stop at them and never take
+        # in (and then fail to redact) part of an exact match
+        partial_matches = self.matcher.find_partial_matches(
+            raw_text, self.matcher.find_exact_matches(raw_text)
+        )
+        if self.interactive:
+            self.matcher.annotate_line_offsets(raw_text, partial_matches, self.context_lines)
 
-        for match in partial_matches:
-            stats.add_partial_match(match.pii_field.name)
+        stats.add_partial_matches(match.pii_field.name for match in partial_matches)
 
         self.reporter.print_partial_summary(len(partial_matches))
 
@@ -158,13 +312,19 @@ class Redactor:
             selected_indices = self._prompt_partial_matches(partial_matches)
 
             # For selected partial matches, we need to do another pass
+            selected_matches = [m for i, m in enumerate(partial_matches) if i in selected_indices]
+
+            # Most leaves contain none of the selected tokens; find the first one
+            # that occurs with a single scan instead of testing every token
+            first_selected = first_occurrence_finder([m.matched_text for m in selected_matches])
+
             def redact_partial(s: str) -> str:
                 result = s
-                for i, match in enumerate(partial_matches):
-                    if i in selected_indices:
-                        # Check if this match is in this string
-                        if match.matched_text in result or match.matched_text.lower() in result.lower():
-                            result = self._replace_partial(result, match)
+                for match in selected_matches[first_selected(s):]:
+                    # Check if this match is in this string. The token is replaced
+                    # verbatim, so a case-insensitive check would not find more.
+                    if match.matched_text in result:
+                        result = self._replace_partial(result, match)
                 return result
 
             # Re-process with partial replacements
@@ -176,8 +336,7 @@ class Redactor:
                 else:
                     stats.add_partial_skipped(match.pii_field.name)
         elif partial_matches:
-            for match in partial_matches:
-                stats.add_partial_skipped(match.pii_field.name)
+            stats.add_partial_skipped_all(match.pii_field.name for match in partial_matches)
 
         # Write output
         if not self.dry_run:
@@ -186,31 +345,75 @@ class Redactor:
         self.reporter.print_file_complete(stats)
         return stats
 
+    def _replacement_text(self, match: Match) -> str:
+        """Replacement for the text covered by an exact or partial match, preserving case."""
+        if match.is_exact:
+            return build_replacement(match, preserve_case=True)
+        return self._partial_replacement(match)
+
+    def _partial_replacement(self, match: Match) -> str:
+        """Return match.matched_text with every occurrence of the PII value replaced, preserving case."""
+        return self._substitute(match.pii_field, match.matched_text)
+
+    def _substitute(self, pii_field: PIIField, text: str) -> str:
+        """Return text with every occurrence of the field's PII value replaced, preserving case."""
+        cached = self._partial_patterns.get(id(pii_field))
+        if cached is None:
+            flags = 0 if self.config.case_sensitive else re.IGNORECASE
+            cached = (
+                re.compile(re.escape(pii_field.value), flags),
+                partial(_replace_preserving_case, pii_field=pii_field)
+            )
+            self._partial_patterns[id(pii_field)] = cached
+
+        pattern, replace = cached
+        return pattern.sub(replace, text)
+
+    def _merge_partial_matches(self, text: str, matches: list[Match]) -> tuple[list[Match], dict[int, str]]:
+        """
+        Merge overlapping partial matches (tokens of a multi-word PII value and of
+        a value inside it, e.g. "xJohn Smithy" and "xJohn") into one match over
+        their combined span, so no selected match is dropped by apply_replacements.
+        Returns the matches and the replacement text of each merged one, by id().
+        """
+        result = []
+        fields_by_span = {}  # id() of a merged match -> fields to replace in it
+        for match in sorted(matches, key=lambda m: m.start):
+            last = result[-1] if result else None
+            if last is None or match.start >= last.end:
+                result.append(match)
+                continue
+
+            fields = fields_by_span.pop(id(last), [last.pii_field])
+            fields.append(match.pii_field)
+            end = max(last.end, match.end)
+            merged = Match(
+                pii_field=last.pii_field,
+                start=last.start,
+                end=end,
+                matched_text=text[last.start:end],
+                is_exact=False
+            )
+            result[-1] = merged
+            fields_by_span[id(merged)] = fields
+
+        replacements = {}
+        for match in result:
+            fields = fields_by_span.get(id(match))
+            if fields is not None:
+                span = match.matched_text
+                for pii_field in fields:
+                    span = self._substitute(pii_field, span)
+                replacements[id(match)] = span
+
+        return result, replacements
+
     def _replace_partial(self, text: str, match: Match) -> str:
-        """Replace a partial match in text, preserving case."""
-        pii_value = match.pii_field.value
-        replacement = match.pii_field.replacement
-        matched_text = match.matched_text
-
-        # Find where the PII value is within the matched text
-        flags = 0 if self.config.case_sensitive else re.IGNORECASE
-        pattern = re.escape(pii_value)
-
-        def replace_preserving_case(m):
-            original = m.group()
-            if original.isupper():
-                return replacement.upper()
-            elif original.islower():
-                return replacement.lower()
-            elif original[0].isupper():
-                return replacement.capitalize()
-            return replacement
-
-        # Replace the PII value within the matched text
-        new_matched = re.sub(pattern, replace_preserving_case, matched_text, flags=flags)
-
-        # Now replace the matched_text with new_matched in the full text
-        return text.replace(matched_text, new_matched)
+        """
+        Replace a partial match in a string that did not yield its positions
+        (e.g. a value in a structured file), preserving case.
+        """
+        return text.replace(match.matched_text, self._partial_replacement(match))
 
     def _prompt_partial_matches(self, matches: list[Match]) -> set[int]:
         """Prompt user to select which partial matches to replace."""
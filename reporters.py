@@ -3,55 +3,87 @@ Statistics tracking and report generation.
 """
 
 import json
+import sys
+from collections import Counter
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from matchers import Match
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the standard library json module
+    orjson = None
+
 
 @dataclass
 class FileStats:
     """Statistics for a single file."""
     file_path: str
     output_path: str
-    exact_matches: dict[str, int] = field(default_factory=dict)  # field_name -> count
-    partial_matches: dict[str, int] = field(default_factory=dict)  # field_name -> count
-    partial_replaced: dict[str, int] = field(default_factory=dict)  # field_name -> count replaced
-    partial_skipped: dict[str, int] = field(default_factory=dict)  # field_name -> count skipped
+    exact_matches: Counter[str] = field(default_factory=Counter)  # field_name -> count
+    partial_matches: Counter[str] = field(default_factory=Counter)  # field_name -> count
+    partial_replaced: Counter[str] = field(default_factory=Counter)  # field_name -> count replaced
+    partial_skipped: Counter[str] = field(default_factory=Counter)  # field_name -> count skipped
+
+    # Running totals, kept up to date by the add_* methods
+    _total_exact: int = field(default=0, init=False, repr=False)
+    _total_partial_found: int = field(default=0, init=False, repr=False)
+    _total_partial_replaced: int = field(default=0, init=False, repr=False)
+    _total_partial_skipped: int = field(default=0, init=False, repr=False)
 
     @property
     def total_exact(self) -> int:
-        return sum(self.exact_matches.values())
+        return self._total_exact
 
     @property
     def total_partial_found(self) -> int:
-        return sum(self.partial_matches.values())
+        return self._total_partial_found
 
     @property
     def total_partial_replaced(self) -> int:
-        return sum(self.partial_replaced.values())
+        return self._total_partial_replaced
 
     @property
     def total_partial_skipped(self) -> int:
-        return sum(self.partial_skipped.values())
+        return self._total_partial_skipped
 
     @property
     def total_replacements(self) -> int:
-        return self.total_exact + self.total_partial_replaced
+        return self._total_exact + self._total_partial_replaced
 
     def add_exact_match(self, field_name: str) -> None:
-        self.exact_matches[field_name] = self.exact_matches.get(field_name, 0) + 1
+        self.exact_matches[field_name] += 1
+        self._total_exact += 1
+
+    def add_exact_matches(self, field_names: Iterable[str]) -> None:
+        field_names = tuple(field_names)
+        self.exact_matches.update(field_names)
+        self._total_exact += len(field_names)
 
     def add_partial_match(self, field_name: str) -> None:
-        self.partial_matches[field_name] = self.partial_matches.get(field_name, 0) + 1
+        self.partial_matches[field_name] += 1
+        self._total_partial_found += 1
+
+    def add_partial_matches(self, field_names: Iterable[str]) -> None:
+        field_names = tuple(field_names)
+        self.partial_matches.update(field_names)
+        self._total_partial_found += len(field_names)
 
     def add_partial_replaced(self, field_name: str) -> None:
-        self.partial_replaced[field_name] = self.partial_replaced.get(field_name, 0) + 1
+        self.partial_replaced[field_name] += 1
+        self._total_partial_replaced += 1
 
     def add_partial_skipped(self, field_name: str) -> None:
-        self.partial_skipped[field_name] = self.partial_skipped.get(field_name, 0) + 1
+        self.partial_skipped[field_name] += 1
+        self._total_partial_skipped += 1
+
+    def add_partial_skipped_all(self, field_names: Iterable[str]) -> None:
+        field_names = tuple(field_names)
+        self.partial_skipped.update(field_names)
+        self._total_partial_skipped += len(field_names)
 
 
 @dataclass
@@ -62,12 +94,25 @@ class Report:
     completed_at: str = ""
     config_file: str = ""
 
+    # Running totals over all files, kept up to date by add_file_stats()
+    _total_exact: int = field(default=0, init=False, repr=False)
+    _total_partial_replaced: int = field(default=0, init=False, repr=False)
+    _total_partial_skipped: int = field(default=0, init=False, repr=False)
+
     def __post_init__(self):
         if not self.started_at:
             self.started_at = datetime.now().isoformat()
+        for stats in self.files:
+            self._add_totals(stats)
 
     def add_file_stats(self, stats: FileStats) -> None:
         self.files.append(stats)
+        self._add_totals(stats)
+
+    def _add_totals(self, stats: FileStats) -> None:
+        self._total_exact += stats.total_exact
+        self._total_partial_replaced += stats.total_partial_replaced
+        self._total_partial_skipped += stats.total_partial_skipped
 
     def complete(self) -> None:
         self.completed_at = datetime.now().isoformat()
@@ -78,19 +123,19 @@ class Report:
 
     @property
     def total_exact_replacements(self) -> int:
-        return sum(f.total_exact for f in self.files)
+        return self._total_exact
 
     @property
     def total_partial_replaced(self) -> int:
-        return sum(f.total_partial_replaced for f in self.files)
+        return self._total_partial_replaced
 
     @property
     def total_partial_skipped(self) -> int:
-        return sum(f.total_partial_skipped for f in self.files)
+        return self._total_partial_skipped
 
     @property
     def total_replacements(self) -> int:
-        return self.total_exact_replacements + self.total_partial_replaced
+        return self._total_exact + self._total_partial_replaced
 
     def to_dict(self) -> dict[str, Any]:
         """Convert report to dictionary for JSON serialization."""
@@ -127,8 +172,18 @@ class Report:
 
     def save(self, path: Path) -> None:
         """Save report to JSON file."""
+        report = self.to_dict()
+        if orjson is not None:
+            path.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            return
+
         with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def _no_color(text: str, color: str) -> str:
+    """ConsoleReporter._c when color is disabled (a module function, so reporters stay picklable)."""
+    return text
 
 
 class ConsoleReporter:
@@ -143,9 +198,24 @@ class ConsoleReporter:
     CYAN = "\033[36m"
     RED = "\033[31m"
     DIM = "\033[2m"
+    BOLD_BLUE = BOLD + BLUE
+    RED_BOLD = RED + BOLD
+    YELLOW_BOLD = YELLOW + BOLD
 
     def __init__(self, use_color: bool = True):
         self.use_color = use_color
+        if not use_color:
+            # Skip the per-call branch entirely when color is off
+            self._c = _no_color
+
+        # Constant labels, colored once
+        self._processing_label = self._c('Processing:', self.BOLD)
+        self._no_exact_label = self._c('No exact matches found', self.DIM)
+        self._exact_label = self._c('Exact matches found and replaced:', self.GREEN)
+        self._no_partial_label = self._c('No probable matches found', self.DIM)
+        self._marker = self._c('>', self.YELLOW)
+        self._output_label = self._c('Output:', self.GREEN)
+        self._replacements_label = self._c('Replacements:', self.CYAN)
 
     def _c(self, text: str, color: str) -> str:
         """Apply color if enabled."""
@@ -154,69 +224,77 @@ class ConsoleReporter:
         return text
 
     def print_header(self, text: str) -> None:
-        print(f"\n{self._c(text, self.BOLD + self.BLUE)}")
+        print(f"\n{self._c(text, self.BOLD_BLUE)}")
         print("=" * len(text))
 
     def print_file_start(self, file_path: str) -> None:
-        print(f"\n{self._c('Processing:', self.BOLD)} {file_path}")
+        print(f"\n{self._processing_label} {file_path}")
 
     def print_exact_matches(self, stats: FileStats) -> None:
         if not stats.exact_matches:
-            print(f"  {self._c('No exact matches found', self.DIM)}")
+            print(f"  {self._no_exact_label}")
             return
 
-        print(f"\n  {self._c('Exact matches found and replaced:', self.GREEN)}")
+        lines = [f"\n  {self._exact_label}"]
         for field_name, count in stats.exact_matches.items():
-            print(f"    - {field_name}: {count} occurrence(s)")
+            lines.append(f"    - {field_name}: {count} occurrence(s)")
+        sys.stdout.write('\n'.join(lines) + '\n')
 
     def print_partial_match(self, index: int, match: Match) -> None:
         """Print a single partial match with context."""
-        print(f"\n  {self._c(f'[{index}]', self.YELLOW)} \"{self._c(match.matched_text, self.RED)}\" "
-              f"contains \"{match.pii_field.value}\" (line {match.line_number})")
-
-        # Print context before
-        line_num = match.line_number - len(match.context_before)
-        for line in match.context_before:
-            print(f"      {self._c(str(line_num).rjust(4), self.DIM)}: {line}")
+        lines = [f"\n  {self._c(f'[{index}]', self.YELLOW)} \"{self._c(match.matched_text, self.RED)}\" "
+                 f"contains \"{match.pii_field.value}\" (line {match.line_number})"]
+
+        # Context before
+        context_before = match.context_before
+        line_num = match.line_number - len(context_before)
+        for line in context_before:
+            lines.append(f"      {self._c(str(line_num).rjust(4), self.DIM)}: {line}")
             line_num += 1
 
-        # Print the matching line with highlight
+        # The matching line with highlight
         highlighted_line = match.line_text.replace(
             match.matched_text,
-            self._c(match.matched_text, self.RED + self.BOLD)
+            self._c(match.matched_text, self.RED_BOLD)
         )
-        print(f"    {self._c('>', self.YELLOW)} {self._c(str(match.line_number).rjust(4), self.DIM)}: {highlighted_line}")
+        lines.append(f"    {self._marker} {self._c(str(match.line_number).rjust(4), self.DIM)}: {highlighted_line}")
 
-        # Print context after
+        # Context after
         line_num = match.line_number + 1
         for line in match.context_after:
-            print(f"      {self._c(str(line_num).rjust(4), self.DIM)}: {line}")
+            lines.append(f"      {self._c(str(line_num).rjust(4), self.DIM)}: {line}")
             line_num += 1
 
+        sys.stdout.write('\n'.join(lines) + '\n')
+
     def print_partial_summary(self, total: int) -> None:
         if total == 0:
-            print(f"\n  {self._c('No probable matches found', self.DIM)}")
+            print(f"\n  {self._no_partial_label}")
         else:
             print(f"\n  {self._c(f'Found {total} probable match(es)', self.YELLOW)}")
 
     def print_file_complete(self, stats: FileStats) -> None:
-        print(f"\n  {self._c('Output:', self.GREEN)} {stats.output_path}")
-        print(f"  {self._c('Replacements:', self.CYAN)} {stats.total_replacements} "
+        print(f"\n  {self._output_label} {stats.output_path}")
+        print(f"  {self._replacements_label} {stats.total_replacements} "
               f"(exact: {stats.total_exact}, partial: {stats.total_partial_replaced})")
 
     def print_final_summary(self, report: Report) -> None:
-        self.print_header("Summary")
-        print(f"  Files processed: {report.total_files}")
-        print(f"  Total exact replacements: {report.total_exact_replacements}")
-        print(f"  Total probable replacements: {report.total_partial_replaced}")
-        print(f"  Total probable skipped: {report.total_partial_skipped}")
-        print(f"  {self._c(f'Total replacements: {report.total_replacements}', self.BOLD)}")
+        lines = [
+            f"\n{self._c('Summary', self.BOLD_BLUE)}",
+            "=" * len("Summary"),
+            f"  Files processed: {report.total_files}",
+            f"  Total exact replacements: {report.total_exact_replacements}",
+            f"  Total probable replacements: {report.total_partial_replaced}",
+            f"  Total probable skipped: {report.total_partial_skipped}",
+            f"  {self._c(f'Total replacements: {report.total_replacements}', self.BOLD)}",
+        ]
+        sys.stdout.write('\n'.join(lines) + '\n')
 
     def print_dry_run_notice(self) -> None:
-        print(f"\n{self._c('DRY RUN - No files were modified', self.YELLOW + self.BOLD)}")
+        print(f"\n{self._c('DRY RUN - No files were modified', self.YELLOW_BOLD)}")
 
     def print_error(self, message: str) -> None:
-        print(f"{self._c('Error:', self.RED + self.BOLD)} {message}")
+        print(f"{self._c('Error:', self.RED_BOLD)} {message}")
 
     def print_warning(self, message: str) -> None:
         print(f"{self._c('Warning:', self.YELLOW)} {message}")